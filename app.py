@@ -1,8 +1,71 @@
+import io
+import re
+import textwrap
+from functools import lru_cache
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import numpy as np
+
+# Column selections and reset_index copies become lazy views under Copy-on-Write. pandas 3 always
+# works this way (and warns if the option is set), so only switch it on for pandas 2.x.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Likert scale responses in display order
+LIKERT_RESPONSES = ['Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree']
+
+# Mapping used when responses are grouped into Positive, Negative and Don't Know
+RESPONSE_GROUPS = {
+    'Strongly Agree': 'Positive',
+    'Agree': 'Positive',
+    'Strongly Disagree': 'Negative',
+    'Disagree': 'Negative',
+    "Don't Know": "Don't Know"
+}
+
+# Response display order for each (group responses, exclude Don't Know) combination
+RESPONSE_ORDERS = {
+    (True, True): ('Positive', 'Negative'),
+    (True, False): ('Positive', "Don't Know", 'Negative'),
+    (False, True): ('Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree'),
+    (False, False): ('Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree')
+}
+
+# Chart colors for grouped and individual responses
+GROUP_COLORS = {
+    'Positive': '#2ecc71',
+    'Negative': '#e74c3c',
+    "Don't Know": '#95a5a6'
+}
+
+DETAIL_COLORS = {
+    'Strongly Agree': '#27ae60',
+    'Agree': '#2ecc71',
+    "Don't Know": '#95a5a6',
+    'Disagree': '#e67e22',
+    'Strongly Disagree': '#e74c3c'
+}
+
+# Fallback color for responses outside the Likert scale
+DEFAULT_COLOR = '#3498db'
+
+# Largest question heatmap that still gets a percentage label in every cell; bigger ones rely on hover
+HEATMAP_CELL_TEXT_LIMIT = 20
+
+# Question heatmaps with more rows than this offer to merge similar questions
+HEATMAP_ROW_LIMIT = 60
+
+# Question themes, checked in order; the first matching keyword pattern wins
+QUESTION_CATEGORY_PATTERNS = {
+    'Customer Focused': re.compile(r'customer', re.IGNORECASE),
+    'Innovation': re.compile(r'innov|new|bold', re.IGNORECASE),
+    'Excellence': re.compile(r'excellence|high standard|deliver great|pride|best', re.IGNORECASE),
+    'Accountability': re.compile(r'accountab|own', re.IGNORECASE),
+    'Supportive': re.compile(r'support|help|encourag', re.IGNORECASE),
+    'Culture & Values Awareness': re.compile(r'value|culture|mission|recommend', re.IGNORECASE),
+    'Growth & Change': re.compile(r'growth|change|acquisition|anxious|expand', re.IGNORECASE)
+}
 
 # Page configuration
 st.set_page_config(
@@ -31,19 +94,21 @@ if uploaded_file is None:
     """)
     st.stop()
 
+# Plotly and PyArrow are heavy to import and only needed once a file is uploaded,
+# so keep them off the upload screen's cold start
+import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.compute as pc
+
 @st.cache_data
 def load_data(uploaded_file):
-    """Load and process the survey data"""
-    # Read the CSV file with proper encoding
-    df = pd.read_csv(uploaded_file, skiprows=1, encoding='cp1252')
-    
-    # Reset file pointer and get questions from first row
-    uploaded_file.seek(0)
-    questions_df = pd.read_csv(uploaded_file, nrows=1, encoding='cp1252')
-    questions = questions_df.columns.tolist()
+    """Load and process the survey data, returning it with its question categories and counts cube"""
+    raw = uploaded_file.getvalue()
     
-    # Rename columns to match questions
-    df.columns = questions
+    # Parse the file once: questions come from the first record and the "Response" sub-header
+    # record is skipped. The C parser counts quoted line breaks as part of the record, so
+    # multi-line questions and answers stay intact.
+    df = pd.read_csv(io.BytesIO(raw), header=0, skiprows=[1], encoding='cp1252')
     
     # Clean column names for easier access
     df = df.rename(columns={
@@ -56,93 +121,684 @@ def load_data(uploaded_file):
     cols_to_drop = [col for col in df.columns if 'Other (please specify)' in str(col) or col == 'Response']
     df = df.drop(columns=cols_to_drop, errors='ignore')
     
-    return df
+    # Store responses as ordered categoricals so counting and filtering work on integer codes
+    # (int8 for the five Likert levels). Unexpected answers are appended as extra categories
+    # rather than being dropped.
+    likert_cols = get_likert_columns(df)
+    if likert_cols:
+        answers = pd.unique(df[likert_cols].values.ravel())
+        extra_answers = sorted((a for a in answers if pd.notna(a) and a not in LIKERT_RESPONSES), key=str)
+        likert_dtype = pd.CategoricalDtype(LIKERT_RESPONSES + extra_answers, ordered=True)
+        df[likert_cols] = df[likert_cols].astype(likert_dtype)
+    
+    df[['Department', 'Tenure']] = df[['Department', 'Tenure']].astype('category')
+    
+    # Derived once per upload here, inside the cached loader, so reruns never rehash the frame
+    question_categories = categorize_questions(likert_cols)
+    counts_cube = build_counts_cube(df, likert_cols)
+    
+    return df, question_categories, counts_cube
 
 def get_likert_columns(df):
     """Get columns that contain Likert scale responses"""
-    likert_values = ['Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree', "Don't Know"]
-    likert_cols = []
+    candidate_cols = [
+        col for col in df.columns
+        if col not in ['Respondent_ID', 'Department', 'Tenure'] and not col.startswith('Open-Ended')
+    ]
     
-    for col in df.columns:
-        if col not in ['Respondent_ID', 'Department', 'Tenure'] and not col.startswith('Open-Ended'):
-            # Check if column has Likert responses
-            unique_vals = df[col].dropna().unique()
-            if any(val in likert_values for val in unique_vals):
-                likert_cols.append(col)
+    # Check all candidate columns for Likert responses in a single vectorized pass
+    has_likert = df[candidate_cols].isin(LIKERT_RESPONSES).any(axis=0)
+    likert_cols = [col for col, is_likert in zip(candidate_cols, has_likert) if is_likert]
     
     return likert_cols
 
 def categorize_questions(likert_cols):
     """Categorize questions by theme based on keywords"""
-    categories = {
-        'Customer Focused': [],
-        'Innovation': [],
-        'Excellence': [],
-        'Accountability': [],
-        'Supportive': [],
-        'Culture & Values Awareness': [],
-        'Growth & Change': [],
-        'Other': []
-    }
-    
-    for col in likert_cols:
-        col_lower = col.lower()
-        if 'customer' in col_lower:
-            categories['Customer Focused'].append(col)
-        elif 'innov' in col_lower or 'new' in col_lower or 'bold' in col_lower:
-            categories['Innovation'].append(col)
-        elif 'excellence' in col_lower or 'high standard' in col_lower or 'deliver great' in col_lower or 'pride' in col_lower or 'best' in col_lower:
-            categories['Excellence'].append(col)
-        elif 'accountab' in col_lower or 'own' in col_lower or 'decision' in col_lower and 'own' in col_lower:
-            categories['Accountability'].append(col)
-        elif 'support' in col_lower or 'help' in col_lower or 'encourag' in col_lower:
-            categories['Supportive'].append(col)
-        elif 'value' in col_lower or 'culture' in col_lower or 'mission' in col_lower or 'recommend' in col_lower:
-            categories['Culture & Values Awareness'].append(col)
-        elif 'growth' in col_lower or 'change' in col_lower or 'acquisition' in col_lower or 'anxious' in col_lower or 'expand' in col_lower:
-            categories['Growth & Change'].append(col)
-        else:
-            categories['Other'].append(col)
+    category_names = list(QUESTION_CATEGORY_PATTERNS)
+    
+    # One boolean mask per category, then pick the first matching category for each question
+    matches = [
+        np.array([bool(pattern.search(col)) for col in likert_cols], dtype=bool)
+        for pattern in QUESTION_CATEGORY_PATTERNS.values()
+    ]
+    assigned = np.select(matches, category_names, default='Other')
+    
+    categories = {name: [] for name in category_names + ['Other']}
+    for col, category in zip(likert_cols, assigned):
+        categories[category].append(col)
     
     # Remove empty categories
     return {k: v for k, v in categories.items() if v}
 
 def group_responses(series, group_mode, exclude_dont_know=False):
     """Group responses based on mode and optionally exclude Don't Know"""
-    if group_mode:
+    if group_mode and isinstance(series.dtype, pd.CategoricalDtype):
+        # Grouped mode on categoricals: look up each category's group code once, then gather the
+        # row codes with np.take. The appended -1 keeps missing (and unmapped) answers missing.
+        groups = pd.Index(RESPONSE_ORDERS[(True, False)])
+        group_codes = np.append(groups.get_indexer(series.cat.categories.map(RESPONSE_GROUPS)), -1).astype(np.int8)
+        grouped = pd.Categorical.from_codes(np.take(group_codes, series.cat.codes.to_numpy()), categories=groups, ordered=True)
+        result = pd.Series(grouped, index=series.index, name=series.name)
+    elif group_mode:
         # Grouped mode: Positive, Negative, Don't Know
-        mapping = {
-            'Strongly Agree': 'Positive',
-            'Agree': 'Positive',
-            'Strongly Disagree': 'Negative',
-            'Disagree': 'Negative',
-            "Don't Know": "Don't Know"
-        }
-        result = series.map(mapping)
+        result = series.map(RESPONSE_GROUPS)
     else:
         # Original mode: keep all 5 categories
         result = series
     
     # Remove Don't Know if requested
     if exclude_dont_know:
-        result = result[result != "Don't Know"]
+        if isinstance(result.dtype, pd.CategoricalDtype):
+            # Drop only the Don't Know rows; answers outside the groups stay as missing rows
+            result = result[result != "Don't Know"].cat.remove_categories(["Don't Know"])
+        else:
+            result = result[result != "Don't Know"]
     
     return result
 
-def calculate_response_distribution(df, columns, group_mode, exclude_dont_know=False):
-    """Calculate response distribution for selected columns"""
-    all_responses = []
+def build_counts_cube(df, likert_cols):
+    """Count responses per Department, Tenure, question and response in a single pass"""
+    long_df = df.melt(
+        id_vars=['Department', 'Tenure'],
+        value_vars=likert_cols,
+        var_name='Question',
+        value_name='Response'
+    )
+    return long_df.groupby(['Department', 'Tenure', 'Question', 'Response'], observed=True).size().rename('Count')
+
+def slice_counts(cube, departments, tenures, questions, group_mode, exclude_dont_know=False):
+    """Select the filtered part of the counts cube as a long frame of response counts"""
+    counts = cube.reset_index()
+    counts = counts[
+        counts['Department'].isin(departments) &
+        counts['Tenure'].isin(tenures) &
+        counts['Question'].isin(questions)
+    ]
+    
+    responses = group_responses(counts['Response'], group_mode, exclude_dont_know)
+    return counts.loc[responses.index].assign(Response=responses)
+
+def present_responses(response_order, responses):
+    """The responses that actually occur, in display order"""
+    present = set(responses)
+    return [r for r in response_order if r in present]
+
+def response_totals(counts):
+    """Total the response counts over every department, tenure and question in the slice"""
+    # One weighted bincount over the Response codes; code -1 (an answer outside the groups) is skipped
+    responses = counts['Response'].cat
+    codes = responses.codes.to_numpy()
+    answered = codes >= 0
+    totals = np.bincount(
+        codes[answered],
+        weights=counts['Count'].to_numpy()[answered],
+        minlength=len(responses.categories)
+    ).astype(np.int64)
+    totals = pd.Series(totals, index=pd.Index(responses.categories, name='Response'), name='Count')
+    return totals[totals > 0]
+
+def response_percentages_by(counts, group_col, include_unmatched=False):
+    """Total the response counts per group, with each response's percentage within its group"""
+    totals = counts.groupby([group_col, 'Response'], observed=True)['Count'].sum().reset_index()
+    if include_unmatched:
+        # Answers outside the response groups (missing Response) still count towards the group total
+        group_totals = counts.groupby(group_col, observed=True)['Count'].sum()
+        totals['Percentage'] = totals['Count'] / group_totals.reindex(totals[group_col]).to_numpy() * 100
+    else:
+        totals['Percentage'] = totals['Count'] / totals.groupby(group_col, observed=True)['Count'].transform('sum') * 100
+    return totals
+
+def merge_similar_questions(question_counts, question_groups, max_rows):
+    """Merge the questions with the most similar response distributions, within their category, into at most max_rows rows"""
+    counts = question_counts.to_numpy(dtype=float, copy=True)
+    groups = np.array(question_groups, dtype=object)
+    members = [[q] for q in question_counts.index]
+    
+    # Agglomerative pass: repeatedly merge the closest pair of rows from the same category, comparing
+    # their response shares; a merged row's counts are the sum of its questions' counts
+    while len(members) > max_rows:
+        totals = counts.sum(axis=1, keepdims=True)
+        shares = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+        distances = np.sqrt(((shares[:, None, :] - shares[None, :, :]) ** 2).sum(axis=2))
+        distances[groups[:, None] != groups[None, :]] = np.inf
+        np.fill_diagonal(distances, np.inf)
+        
+        i, j = sorted(np.unravel_index(np.argmin(distances), distances.shape))
+        if not np.isfinite(distances[i, j]):
+            break
+        
+        counts[i] += counts[j]
+        counts = np.delete(counts, j, axis=0)
+        groups = np.delete(groups, j)
+        members[i] += members.pop(j)
+    
+    labels = pd.Index([
+        qs[0] if len(qs) == 1 else f"{group}: {len(qs)} similar questions, e.g. {qs[0]}"
+        for group, qs in zip(groups, members)
+    ], name='Question')
+    row_text = pd.Series([
+        f"<b>Question:</b><br>{qs[0]}" if len(qs) == 1 else f"<b>Questions ({len(qs)}):</b><br>" + '<br>'.join(qs)
+        for qs in members
+    ], index=labels)
+    
+    merged_counts = pd.DataFrame(counts.astype(np.int64), index=labels, columns=question_counts.columns)
+    return merged_counts, row_text
+
+# Every filter, grouping and sort combination is a separate entry shared by all sessions, so keep
+# only the most recent ones
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_question_heatmap(counts, questions, question_groups, response_order, sort_by='None', sort_ascending=True, max_rows=None):
+    """Question heatmap percentages and hover text in display order, merged into at most max_rows rows if given"""
+    # Build heatmap data for all questions from the counts slice in one groupby
+    question_counts = counts.groupby(['Question', 'Response'], observed=True)['Count'].sum().unstack(fill_value=0)
+    question_counts = question_counts.loc[[q for q in questions if q in question_counts.index]]
+    
+    if max_rows is not None and len(question_counts) > max_rows:
+        group_of = dict(zip(questions, question_groups))
+        question_counts, row_text = merge_similar_questions(
+            question_counts, [group_of[q] for q in question_counts.index], max_rows
+        )
+    else:
+        row_text = pd.Series('<b>Question:</b><br>' + question_counts.index, index=question_counts.index)
+    
+    # Percentage of each row's responses, one column per response type
+    q_heatmap_df = question_counts.div(question_counts.sum(axis=1), axis=0).mul(100)
+    q_heatmap_df = q_heatmap_df.reindex(columns=list(response_order), fill_value=0)
+    
+    # Sort if a sort option is selected
+    if sort_by != 'None' and sort_by in q_heatmap_df.columns:
+        q_heatmap_df = q_heatmap_df.sort_values(by=sort_by, ascending=sort_ascending)
+    
+    question_counts = question_counts.reindex(index=q_heatmap_df.index, columns=list(response_order), fill_value=0)
+    row_text = row_text.reindex(q_heatmap_df.index).to_numpy(dtype=object)
+    
+    # Build the hover text for every cell in one Arrow string join over the flattened question x response
+    # grid (questions repeated along each row, responses tiled down the columns), then reshape it back
+    n_questions, n_responses = q_heatmap_df.shape
+    hover_text = pc.binary_join_element_wise(
+        pa.array(np.repeat(row_text, n_responses), type=pa.string()),
+        '<br><br><b>Response:</b> ',
+        pa.array(np.tile(q_heatmap_df.columns.to_numpy(dtype=object), n_questions), type=pa.string()),
+        '<br><b>Percentage:</b> ',
+        pa.array(np.char.mod('%.1f', q_heatmap_df.to_numpy()).ravel(), type=pa.string()),
+        '%<br><b>Responses:</b> ',
+        pc.cast(pa.array(question_counts.to_numpy().ravel()), pa.string()),
+        ''
+    )
+    hover_text = hover_text.to_numpy(zero_copy_only=False).reshape(n_questions, n_responses)
+    
+    return q_heatmap_df, hover_text
+
+def category_options(series):
+    """Categories in order of first appearance, found from the integer codes (code -1 is missing)"""
+    codes = pd.unique(series.cat.codes.to_numpy())
+    return series.cat.categories[codes[codes >= 0]].tolist()
+
+def category_mask(series, selected):
+    """Boolean mask of rows whose category is one of the selected values, compared on integer codes"""
+    selected_codes = series.cat.categories.get_indexer(selected)
+    return np.isin(series.cat.codes.to_numpy(), selected_codes[selected_codes >= 0])
+
+@st.cache_data
+def lowercase_questions(questions):
+    """Lower-cased question text for case-insensitive search"""
+    return pd.Index(questions).str.lower()
+
+def search_questions(questions, query):
+    """Questions whose text contains the search query, ignoring case"""
+    if not query:
+        return questions
+    
+    matches = lowercase_questions(tuple(questions)).str.contains(query.lower(), regex=False)
+    return [q for q, is_match in zip(questions, matches) if is_match]
+
+def colors_for(responses, group_mode):
+    """Look up the chart color for each response in one vectorized map"""
+    color_map = GROUP_COLORS if group_mode else DETAIL_COLORS
+    return pd.Index(responses, dtype=object).map(color_map).fillna(DEFAULT_COLOR).to_numpy()
+
+@lru_cache(maxsize=512)
+def wrap_text(text, max_len=60):
+    """Wrap text at word boundaries"""
+    return '<br>'.join(textwrap.wrap(text, max_len, break_long_words=False, break_on_hyphens=False))
+
+def grouped_bar_figure(group_df, group_col, group_order, color_map):
+    """Grouped bar chart of response percentages per group, with one go.Bar trace per response"""
+    fig = go.Figure()
+    
+    # Response is an ordered categorical, so the traces come out in scale order
+    for response, response_df in group_df.groupby('Response', observed=True):
+        fig.add_trace(go.Bar(
+            name=response,
+            x=response_df[group_col].tolist(),
+            y=response_df['Percentage'].to_numpy(),
+            customdata=response_df['Count'].to_numpy(),
+            marker_color=color_map.get(response, DEFAULT_COLOR),
+            hovertemplate=f"{group_col}: %{{x}}<br>Response: {response}<br>Percentage: %{{y:.1f}}%<br>Count: %{{customdata}}<extra></extra>"
+        ))
+    
+    fig.update_layout(
+        barmode='group',
+        legend_title_text='Response',
+        xaxis={'categoryorder': 'array', 'categoryarray': list(group_order)}
+    )
+    
+    return fig
+
+def question_bar_figure():
+    """Horizontal response bar figure for the detailed tab, built once per session"""
+    if 'question_bar_figure' not in st.session_state:
+        fig = go.Figure(data=[go.Bar(orientation='h', textposition='auto')])
+        
+        fig.update_layout(
+            xaxis_title="Number of Responses",
+            yaxis_title="Response",
+            height=300,
+            showlegend=False
+        )
+        
+        st.session_state['question_bar_figure'] = fig
+    
+    return st.session_state['question_bar_figure']
+
+@st.fragment
+def render_quick_question_analysis(counts, selected_questions, group_responses_mode):
+    """Quick Question Analysis section; its search box and question picker only rerun this fragment"""
+    # Individual Question Analysis
+    st.markdown("---")
+    st.subheader("Quick Question Analysis")
+    
+    # Search functionality for questions
+    search_query = st.text_input(
+        "Search questions:",
+        value="",
+        key="question_search_overview",
+        placeholder="Type to filter questions..."
+    )
+    
+    # Filter questions based on search
+    filtered_questions = search_questions(selected_questions, search_query)
+    
+    # Show count of filtered questions
+    if search_query:
+        st.caption(f"Showing {len(filtered_questions)} of {len(selected_questions)} questions")
+    
+    # Allow user to select a specific question
+    if filtered_questions:
+        selected_question = st.selectbox(
+            "Select a question to analyze in detail:",
+            options=filtered_questions,
+            key="question_selector_overview"
+        )
+    else:
+        st.warning("No questions match your search.")
+        selected_question = None
+    
+    if selected_question:
+        # The counts slice is already filtered and grouped, so only the question's rows are totalled
+        dist = response_totals(counts[counts['Question'] == selected_question])
+        
+        if not dist.empty:
+            total = dist.sum()
+            dist_pct = (dist / total * 100).round(1)
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Pie chart
+                fig = go.Figure(data=[go.Pie(
+                    labels=dist.index,
+                    values=dist.values,
+                    marker_colors=colors_for(dist.index, group_responses_mode),
+                    textinfo='label+percent',
+                    hovertemplate='%{label}<br>%{value} responses<br>%{percent}<extra></extra>'
+                )])
+                
+                fig.update_layout(
+                    title=f"Response Distribution",
+                    height=400
+                )
+                
+                st.plotly_chart(fig, width='stretch')
+            
+            with col2:
+                # Summary statistics
+                st.markdown("**Response Summary**")
+                summary_df = pd.DataFrame(
+                    {'Responses': dist.values, 'Percentage': dist_pct.values},
+                    index=pd.Index(dist.index, name='Response')
+                )
+                st.dataframe(
+                    summary_df,
+                    width='stretch',
+                    column_config={'Percentage': st.column_config.NumberColumn(format="%.1f%%")}
+                )
+                
+                st.markdown(f"\n**Total Responses**: {total}")
+
+@st.fragment
+def render_category_heatmap(counts, selected_categories, question_categories, response_order):
+    """Response heatmap by question category; its sort controls only rerun this fragment"""
+    sort_options = ['None', *response_order]
+    
+    # Heatmap of responses by category
+    st.markdown("---")
+    st.subheader("Response Heatmap by Question Category")
+    
+    # Add sorting for category heatmap
+    category_sort_by = 'None'  # Default value
+    category_sort_ascending = True
+    if len(selected_categories) > 1:
+        col_cat_sort1, col_cat_sort2, col_cat_sort3 = st.columns([2, 1, 1])
+        
+        with col_cat_sort2:
+            category_sort_by = st.selectbox(
+                "Sort categories by:",
+                options=sort_options,
+                index=0,
+                key="category_heatmap_sort",
+                help="Sort categories by percentage of selected response"
+            )
+        
+        with col_cat_sort3:
+            if category_sort_by != 'None':
+                category_sort_ascending = st.checkbox(
+                    "Ascending",
+                    value=True,
+                    key="category_sort_order",
+                    help="Check for ascending (low to high), uncheck for descending (high to low)"
+                )
+        
+        with col_cat_sort1:
+            if category_sort_by != 'None':
+                cat_sort_direction = "ascending (low to high)" if category_sort_ascending else "descending (high to low)"
+                st.markdown(f"Categories sorted by **{category_sort_by}** ({cat_sort_direction})")
+            else:
+                st.markdown("")
+    
+    if len(selected_categories) > 1:
+        # Label each row of the counts slice with its question's category, then total them in one groupby
+        question_category = {q: cat for cat in selected_categories for q in question_categories.get(cat, [])}
+        category = counts['Question'].map(question_category).rename('Category')
+        category_counts = counts.groupby([category, 'Response'], observed=True)['Count'].sum().unstack(fill_value=0)
+        
+        if not category_counts.empty:
+            # Percentage of each category's responses, one column per response type
+            pivot_df = category_counts.div(category_counts.sum(axis=1), axis=0).mul(100)
+            
+            # Reorder columns
+            pivot_df = pivot_df[present_responses(response_order, pivot_df.columns)]
+            
+            # Sort if a sort option is selected
+            if category_sort_by != 'None' and category_sort_by in pivot_df.columns:
+                pivot_df = pivot_df.sort_values(by=category_sort_by, ascending=category_sort_ascending)
+            
+            fig = go.Figure(data=go.Heatmap(
+                z=pivot_df.to_numpy(dtype=np.float32).round(1),
+                x=pivot_df.columns,
+                y=pivot_df.index,
+                colorscale='RdYlGn',
+                texttemplate='%{z:.1f}%',
+                textfont={"size": 12},
+                hovertemplate='Category: %{y}<br>Response: %{x}<br>Percentage: %{z:.1f}%<extra></extra>'
+            ))
+            
+            fig.update_layout(
+                xaxis_title="Response Type",
+                yaxis_title="Question Category",
+                height=max(400, len(selected_categories) * 60)
+            )
+            
+            st.plotly_chart(fig, width='stretch')
+
+@st.fragment
+def render_question_heatmap(counts, selected_questions, question_categories, response_order):
+    """Response heatmap by individual question; its sort controls only rerun this fragment"""
+    sort_options = ['None', *response_order]
+    
+    # Detailed heatmap by individual question
+    st.markdown("---")
+    st.subheader("Response Heatmap by Individual Question")
+    
+    # Sorting options
+    col_sort1, col_sort2, col_sort3 = st.columns([2, 1, 1])
+    
+    with col_sort2:
+        sort_by = st.selectbox(
+            "Sort by:",
+            options=sort_options,
+            index=0,
+            key="heatmap_sort",
+            help="Sort questions by percentage of selected response"
+        )
+    
+    with col_sort3:
+        if sort_by != 'None':
+            sort_ascending = st.checkbox(
+                "Ascending",
+                value=True,
+                key="heatmap_sort_order",
+                help="Check for ascending (low to high), uncheck for descending (high to low)"
+            )
+        else:
+            sort_ascending = True
     
-    for col in columns:
-        responses = df[col].dropna()
-        grouped = group_responses(responses, group_mode, exclude_dont_know)
-        all_responses.extend(grouped.tolist())
+    with col_sort1:
+        if sort_by != 'None':
+            sort_direction = "ascending (low to high)" if sort_ascending else "descending (high to low)"
+            st.markdown(f"Questions sorted by **{sort_by}** ({sort_direction}). Scroll to view all questions.")
+        else:
+            st.markdown("Each row represents a single question, showing the distribution of responses. Scroll to view all questions.")
+    
+    # Large surveys can optionally merge questions with similar response distributions (within their
+    # category) into at most HEATMAP_ROW_LIMIT rows; the full matrix is the default
+    n_questions = counts['Question'].nunique()
+    merge_similar = False
+    if n_questions > HEATMAP_ROW_LIMIT:
+        merge_similar = st.toggle(
+            f"Merge similar questions into at most {HEATMAP_ROW_LIMIT} rows",
+            value=False,
+            key="heatmap_merge_similar"
+        )
+    max_rows = HEATMAP_ROW_LIMIT if merge_similar else None
     
-    if not all_responses:
-        return pd.Series(dtype=int)
+    question_category = {q: cat for cat, cat_questions in question_categories.items() for q in cat_questions}
+    question_groups = tuple(question_category.get(q, 'Other') for q in selected_questions)
+    q_heatmap_df, hover_text = build_question_heatmap(
+        counts, tuple(selected_questions), question_groups, response_order, sort_by, sort_ascending, max_rows
+    )
     
-    distribution = pd.Series(all_responses).value_counts()
-    return distribution
+    if not q_heatmap_df.empty:
+        if merge_similar:
+            st.caption(
+                f"{n_questions} questions shown as {len(q_heatmap_df)} rows: questions in the same category with "
+                "similar response distributions are merged. Hover over a row to see its questions."
+            )
+        
+        q_heatmap_df.index = pd.Index([wrap_text(q) for q in q_heatmap_df.index], name='Question')
+        
+        fig = go.Figure(data=go.Heatmap(
+            z=q_heatmap_df.to_numpy(dtype=np.float32).round(1),
+            x=q_heatmap_df.columns,
+            y=q_heatmap_df.index,
+            colorscale='RdYlGn',
+            hovertemplate='%{customdata}<extra></extra>',
+            customdata=hover_text
+        ))
+        
+        # Each cell label is its own SVG text node, so large heatmaps show percentages on hover only
+        if len(q_heatmap_df) <= HEATMAP_CELL_TEXT_LIMIT:
+            fig.update_traces(
+                texttemplate='%{z:.1f}%',
+                textfont={"size": 11}
+            )
+        
+        # Calculate height: give each question more space (50px per question minimum), capped so
+        # the full matrix cannot grow into a pathologically tall chart
+        chart_height = min(8000, max(1000, len(q_heatmap_df) * 50))
+        
+        fig.update_layout(
+            height=chart_height,
+            yaxis={
+                'tickfont': {'size': 11},
+                'tickmode': 'linear',
+                'side': 'left',
+                'title': 'Question'
+            },
+            margin=dict(l=400, r=50, t=100, b=100)  # More top/bottom margin for labels
+        )
+        
+        # Configure x-axis to show on both top and bottom
+        fig.update_xaxes(
+            side='top',
+            tickfont={'size': 11},
+            title_text='Response Type',
+            title_standoff=15,
+            mirror='ticks',
+            showticklabels=True,
+            ticks='outside'
+        )
+        
+        # Use container with specific height to enable scrolling
+        st.markdown(
+            """
+            <style>
+            .scrollable-chart {
+                height: 800px;
+                overflow-y: scroll;
+                overflow-x: hidden;
+            }
+            </style>
+            """,
+            unsafe_allow_html=True
+        )
+        
+        st.plotly_chart(fig, width='stretch')
+    else:
+        st.info("No question data available for heatmap.")
+
+@st.fragment
+def render_detailed_analysis(counts, selected_questions, selected_departments, selected_tenure, group_responses_mode, response_order, color_map):
+    """Detailed Questions tab; its search and question picker only rerun this fragment"""
+    # Detailed question-by-question analysis
+    st.subheader("Detailed Question Analysis")
+    st.markdown("Explore each question individually with response breakdowns by department and tenure.")
+    
+    # Search functionality for questions, applied on submit rather than on every edit
+    with st.form("question_search_detailed_form", border=False):
+        search_query_detailed = st.text_input(
+            "Search questions:",
+            value="",
+            key="question_search_detailed",
+            placeholder="Type to filter questions and press Enter..."
+        )
+        st.form_submit_button("Search")
+    
+    # Filter questions based on search
+    filtered_questions_detailed = search_questions(selected_questions, search_query_detailed)
+    
+    # Show count of filtered questions
+    if search_query_detailed:
+        st.caption(f"Showing {len(filtered_questions_detailed)} of {len(selected_questions)} questions")
+    
+    # Question selector
+    if filtered_questions_detailed:
+        question_to_analyze = st.selectbox(
+            "Select a question:",
+            options=filtered_questions_detailed,
+            key="detailed_question_selector"
+        )
+    else:
+        st.warning("No questions match your search.")
+        question_to_analyze = None
+    
+    if question_to_analyze:
+        st.markdown(f"**Question:** {question_to_analyze}")
+        st.markdown("---")
+        
+        # Get this question's already filtered and grouped response counts
+        question_counts = counts[counts['Question'] == question_to_analyze]
+        dist = response_totals(question_counts)
+        # Every answer counts towards the total, including ones outside the response groups
+        total_resp = int(question_counts['Count'].sum())
+        
+        if total_resp > 0:
+            # Overall stats for this question
+            col1, col2, col3 = st.columns(3)
+            
+            
+            with col1:
+                st.metric("Total Responses", total_resp)
+            
+            if group_responses_mode:
+                positive_count = dist.get('Positive', 0)
+                negative_count = dist.get('Negative', 0)
+                with col2:
+                    st.metric("Positive", f"{(positive_count/total_resp*100):.1f}%", f"{positive_count} responses")
+                with col3:
+                    st.metric("Negative", f"{(negative_count/total_resp*100):.1f}%", f"{negative_count} responses")
+            else:
+                agree_count = dist.get('Strongly Agree', 0) + dist.get('Agree', 0)
+                disagree_count = dist.get('Strongly Disagree', 0) + dist.get('Disagree', 0)
+                with col2:
+                    st.metric("Agree/Strongly Agree", f"{(agree_count/total_resp*100):.1f}%", f"{agree_count} responses")
+                with col3:
+                    st.metric("Disagree/Strongly Disagree", f"{(disagree_count/total_resp*100):.1f}%", f"{disagree_count} responses")
+            
+            st.markdown("---")
+            
+            # Overall distribution
+            col1, col2 = st.columns([1, 1])
+            
+            with col1:
+                st.markdown("#### Overall Distribution")
+                dist_pct = (dist / total_resp * 100).round(1)
+                
+                # Order responses
+                shown_responses = present_responses(response_order, dist.index)
+                ordered_dist = dist.reindex(shown_responses)
+                ordered_dist_pct = dist_pct.reindex(shown_responses)
+                
+                # Only swap the data into the session's bar figure; its layout is set once
+                fig = question_bar_figure()
+                fig.update_traces(
+                    y=list(ordered_dist.index),
+                    x=ordered_dist.values,
+                    text=[f"{v:.1f}%" for v in ordered_dist_pct.values],
+                    marker_color=colors_for(ordered_dist.index, group_responses_mode)
+                )
+                
+                st.plotly_chart(fig, width='stretch')
+            
+            with col2:
+                st.markdown("#### Response Breakdown")
+                for resp_type in ordered_dist.index:
+                    count = ordered_dist[resp_type]
+                    pct = ordered_dist_pct[resp_type]
+                    st.markdown(f"**{resp_type}:** {count} ({pct:.1f}%)")
+            
+            # Breakdown by Department and by Tenure
+            for group_col, group_order in [('Department', selected_departments), ('Tenure', selected_tenure)]:
+                st.markdown("---")
+                st.markdown(f"#### Breakdown by {group_col}")
+                
+                group_q_df = response_percentages_by(question_counts, group_col, include_unmatched=True)
+                
+                if not group_q_df.empty:
+                    fig = grouped_bar_figure(group_q_df, group_col, group_order, color_map)
+                    fig.update_traces(texttemplate='%{y:.1f}%', textposition='outside')
+                    
+                    fig.update_layout(
+                        xaxis_title=group_col,
+                        yaxis_title="Percentage (%)",
+                        height=400
+                    )
+                    
+                    st.plotly_chart(fig, width='stretch')
+                else:
+                    st.info(f"No {group_col.lower()} data available for this question.")
+        else:
+            st.warning("No responses available for this question with the current filters.")
 
 def main():
     st.title("📊 Survey Data Dashboard")
@@ -150,20 +806,17 @@ def main():
     
     # Load data
     try:
-        df = load_data(uploaded_file)
+        df, question_categories, counts_cube = load_data(uploaded_file)
     except Exception as e:
         st.error(f"⚠️ Error loading CSV file: {str(e)}")
         st.info("Please make sure you've uploaded a valid Rocscience Core Values Survey CSV file.")
         return
     
-    likert_cols = get_likert_columns(df)
-    question_categories = categorize_questions(likert_cols)
-    
     # Sidebar filters
     st.sidebar.header("Filters")
     
     # Department filter
-    departments = df['Department'].dropna().unique().tolist()
+    departments = category_options(df['Department'])
     selected_departments = st.sidebar.multiselect(
         "Department",
         options=departments,
@@ -171,7 +824,7 @@ def main():
     )
     
     # Tenure filter
-    tenure_options = df['Tenure'].dropna().unique().tolist()
+    tenure_options = category_options(df['Tenure'])
     selected_tenure = st.sidebar.multiselect(
         "Tenure",
         options=tenure_options,
@@ -204,29 +857,37 @@ def main():
         help="When enabled: Removes all 'Don't Know' responses from calculations and visualizations."
     )
     
-    # Filter data
-    filtered_df = df[
-        (df['Department'].isin(selected_departments)) &
-        (df['Tenure'].isin(selected_tenure))
-    ]
+    response_order = RESPONSE_ORDERS[(group_responses_mode, exclude_dont_know)]
     
     # Get selected question columns
     selected_questions = []
     for cat in selected_categories:
         selected_questions.extend(question_categories.get(cat, []))
     
+    # Every chart reads the counts cube, so the filter only has to count the matching respondents.
+    # Only that count is kept in session state, recomputed when the department or tenure selection changes.
+    filter_key = (uploaded_file.file_id, tuple(selected_departments), tuple(selected_tenure))
+    if st.session_state.get('filtered_count_key') != filter_key:
+        st.session_state['filtered_count'] = int(np.count_nonzero(
+            category_mask(df['Department'], selected_departments) &
+            category_mask(df['Tenure'], selected_tenure)
+        ))
+        st.session_state['filtered_count_key'] = filter_key
+    filtered_count = st.session_state['filtered_count']
+    
     # Display metrics
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Responses", len(filtered_df))
+        st.metric("Total Responses", filtered_count)
     
     with col2:
         st.metric("Selected Questions", len(selected_questions))
     
     # Calculate overall sentiment
     if selected_questions:
-        distribution = calculate_response_distribution(filtered_df, selected_questions, group_responses_mode, exclude_dont_know)
+        counts = slice_counts(counts_cube, selected_departments, selected_tenure, selected_questions, group_responses_mode, exclude_dont_know)
+        distribution = response_totals(counts)
         
         if group_responses_mode and 'Positive' in distribution.index:
             total = distribution.sum()
@@ -250,43 +911,20 @@ def main():
         st.warning("⚠️ Please select at least one question category to view results.")
         return
     
+    # Response colors (shared by both tabs)
+    color_map = GROUP_COLORS if group_responses_mode else DETAIL_COLORS
+    
     with tab1:
         # Overall Distribution
         st.subheader("Overall Response Distribution")
         
-        distribution = calculate_response_distribution(filtered_df, selected_questions, group_responses_mode, exclude_dont_know)
-        
         if not distribution.empty:
             # Calculate percentages
             total_responses = distribution.sum()
             distribution_pct = (distribution / total_responses * 100).round(1)
             
-            # Create bar chart
-            if group_responses_mode:
-                color_map = {
-                    'Positive': '#2ecc71',
-                    'Negative': '#e74c3c',
-                    "Don't Know": '#95a5a6'
-                }
-                if exclude_dont_know:
-                    order = ['Positive', 'Negative']
-                else:
-                    order = ['Positive', "Don't Know", 'Negative']
-            else:
-                color_map = {
-                    'Strongly Agree': '#27ae60',
-                    'Agree': '#2ecc71',
-                    "Don't Know": '#95a5a6',
-                    'Disagree': '#e67e22',
-                    'Strongly Disagree': '#e74c3c'
-                }
-                if exclude_dont_know:
-                    order = ['Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree']
-                else:
-                    order = ['Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree']
-            
             # Reorder based on available responses
-            ordered_distribution = distribution_pct.reindex([o for o in order if o in distribution_pct.index])
+            ordered_distribution = distribution_pct.reindex(present_responses(response_order, distribution_pct.index))
             
             fig = go.Figure(data=[
                 go.Bar(
@@ -294,7 +932,7 @@ def main():
                     y=ordered_distribution.values,
                     text=[f"{v:.1f}%<br>({distribution[k]} responses)" for k, v in zip(ordered_distribution.index, ordered_distribution.values)],
                     textposition='auto',
-                    marker_color=[color_map.get(x, '#3498db') for x in ordered_distribution.index]
+                    marker_color=colors_for(ordered_distribution.index, group_responses_mode)
                 )
             ])
             
@@ -309,680 +947,29 @@ def main():
         else:
             st.info("No responses to display with current filters.")
         
-        # Comparison by Department
-        st.subheader("Response Distribution by Department")
-        
-        dept_data = []
-        for dept in selected_departments:
-            dept_df = filtered_df[filtered_df['Department'] == dept]
-            dist = calculate_response_distribution(dept_df, selected_questions, group_responses_mode, exclude_dont_know)
+        # Comparison by Department and by Tenure
+        for group_col, group_order in [('Department', selected_departments), ('Tenure', selected_tenure)]:
+            st.subheader(f"Response Distribution by {group_col}")
             
-            if not dist.empty:
-                total = dist.sum()
-                for response_type, count in dist.items():
-                    dept_data.append({
-                        'Department': dept,
-                        'Response': response_type,
-                        'Percentage': (count / total * 100) if total > 0 else 0,
-                        'Count': count
-                    })
-        
-        if dept_data:
-            dept_df_plot = pd.DataFrame(dept_data)
+            group_df_plot = response_percentages_by(counts, group_col)
             
-            if group_responses_mode:
-                if exclude_dont_know:
-                    category_order = ['Positive', 'Negative']
-                else:
-                    category_order = ['Positive', "Don't Know", 'Negative']
-            else:
-                if exclude_dont_know:
-                    category_order = ['Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree']
-                else:
-                    category_order = ['Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree']
-            
-            fig = px.bar(
-                dept_df_plot,
-                x='Department',
-                y='Percentage',
-                color='Response',
-                barmode='group',
-                category_orders={'Response': [c for c in category_order if c in dept_df_plot['Response'].unique()]},
-                color_discrete_map=color_map,
-                hover_data=['Count']
-            )
-            
-            fig.update_layout(
-                xaxis_title="Department",
-                yaxis_title="Percentage (%)",
-                height=450
-            )
-            
-            st.plotly_chart(fig, width='stretch')
-        
-        # Comparison by Tenure
-        st.subheader("Response Distribution by Tenure")
-        
-        tenure_data = []
-        for tenure in selected_tenure:
-            tenure_df = filtered_df[filtered_df['Tenure'] == tenure]
-            dist = calculate_response_distribution(tenure_df, selected_questions, group_responses_mode, exclude_dont_know)
-            
-            if not dist.empty:
-                total = dist.sum()
-                for response_type, count in dist.items():
-                    tenure_data.append({
-                        'Tenure': tenure,
-                        'Response': response_type,
-                        'Percentage': (count / total * 100) if total > 0 else 0,
-                        'Count': count
-                    })
-        
-        if tenure_data:
-            tenure_df_plot = pd.DataFrame(tenure_data)
-            
-            fig = px.bar(
-                tenure_df_plot,
-                x='Tenure',
-                y='Percentage',
-                color='Response',
-                barmode='group',
-                category_orders={'Response': [c for c in category_order if c in tenure_df_plot['Response'].unique()]},
-                color_discrete_map=color_map,
-                hover_data=['Count']
-            )
-            
-            fig.update_layout(
-                xaxis_title="Tenure",
-                yaxis_title="Percentage (%)",
-                height=450
-            )
-            
-            st.plotly_chart(fig, width='stretch')
-        
-        # Individual Question Analysis
-        st.markdown("---")
-        st.subheader("Quick Question Analysis")
-        
-        # Search functionality for questions
-        search_query = st.text_input(
-            "Search questions:",
-            value="",
-            key="question_search_overview",
-            placeholder="Type to filter questions..."
-        )
-        
-        # Filter questions based on search
-        if search_query:
-            filtered_questions = [q for q in selected_questions if search_query.lower() in q.lower()]
-        else:
-            filtered_questions = selected_questions
-        
-        # Show count of filtered questions
-        if search_query:
-            st.caption(f"Showing {len(filtered_questions)} of {len(selected_questions)} questions")
-        
-        # Allow user to select a specific question
-        if filtered_questions:
-            selected_question = st.selectbox(
-                "Select a question to analyze in detail:",
-                options=filtered_questions,
-                key="question_selector_overview"
-            )
-        else:
-            st.warning("No questions match your search.")
-            selected_question = None
-        
-        if selected_question:
-            question_responses = filtered_df[selected_question].dropna()
-            grouped_responses = group_responses(question_responses, group_responses_mode, exclude_dont_know)
-            
-            if not grouped_responses.empty:
-                dist = grouped_responses.value_counts()
-                total = dist.sum()
-                dist_pct = (dist / total * 100).round(1)
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Pie chart
-                    fig = go.Figure(data=[go.Pie(
-                        labels=dist.index,
-                        values=dist.values,
-                        marker_colors=[color_map.get(x, '#3498db') for x in dist.index],
-                        textinfo='label+percent',
-                        hovertemplate='%{label}<br>%{value} responses<br>%{percent}<extra></extra>'
-                    )])
-                    
-                    fig.update_layout(
-                        title=f"Response Distribution",
-                        height=400
-                    )
-                    
-                    st.plotly_chart(fig, width='stretch')
-                
-                with col2:
-                    # Summary statistics
-                    st.markdown("**Response Summary**")
-                    for response_type in dist.index:
-                        count = dist[response_type]
-                        pct = dist_pct[response_type]
-                        st.markdown(f"- **{response_type}**: {count} responses ({pct:.1f}%)")
-                    
-                    st.markdown(f"\n**Total Responses**: {total}")
-        
-        # Determine sort options based on grouping mode (used by both heatmaps)
-        if group_responses_mode:
-            if exclude_dont_know:
-                sort_options = ['None', 'Positive', 'Negative']
-            else:
-                sort_options = ['None', 'Positive', "Don't Know", 'Negative']
-        else:
-            if exclude_dont_know:
-                sort_options = ['None', 'Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree']
-            else:
-                sort_options = ['None', 'Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree']
-        
-        # Heatmap of responses by category
-        st.markdown("---")
-        st.subheader("Response Heatmap by Question Category")
-        
-        # Add sorting for category heatmap
-        category_sort_by = 'None'  # Default value
-        category_sort_ascending = True
-        if len(selected_categories) > 1:
-            col_cat_sort1, col_cat_sort2, col_cat_sort3 = st.columns([2, 1, 1])
-            
-            with col_cat_sort2:
-                category_sort_by = st.selectbox(
-                    "Sort categories by:",
-                    options=sort_options,
-                    index=0,
-                    key="category_heatmap_sort",
-                    help="Sort categories by percentage of selected response"
-                )
-            
-            with col_cat_sort3:
-                if category_sort_by != 'None':
-                    category_sort_ascending = st.checkbox(
-                        "Ascending",
-                        value=True,
-                        key="category_sort_order",
-                        help="Check for ascending (low to high), uncheck for descending (high to low)"
-                    )
-            
-            with col_cat_sort1:
-                if category_sort_by != 'None':
-                    cat_sort_direction = "ascending (low to high)" if category_sort_ascending else "descending (high to low)"
-                    st.markdown(f"Categories sorted by **{category_sort_by}** ({cat_sort_direction})")
-                else:
-                    st.markdown("")
-        
-        if len(selected_categories) > 1:
-            heatmap_data = []
-            
-            for cat in selected_categories:
-                cat_questions = question_categories.get(cat, [])
-                if cat_questions:
-                    dist = calculate_response_distribution(filtered_df, cat_questions, group_responses_mode, exclude_dont_know)
-                    
-                    if not dist.empty:
-                        total = dist.sum()
-                        for response_type in dist.index:
-                            heatmap_data.append({
-                                'Category': cat,
-                                'Response': response_type,
-                                'Percentage': (dist[response_type] / total * 100) if total > 0 else 0
-                            })
-            
-            if heatmap_data:
-                heatmap_df = pd.DataFrame(heatmap_data)
-                pivot_df = heatmap_df.pivot(index='Category', columns='Response', values='Percentage').fillna(0)
-                
-                # Reorder columns
-                if group_responses_mode:
-                    if exclude_dont_know:
-                        col_order = ['Positive', 'Negative']
-                    else:
-                        col_order = ['Positive', "Don't Know", 'Negative']
-                else:
-                    if exclude_dont_know:
-                        col_order = ['Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree']
-                    else:
-                        col_order = ['Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree']
-                
-                pivot_df = pivot_df[[col for col in col_order if col in pivot_df.columns]]
-                
-                # Sort if a sort option is selected
-                if category_sort_by != 'None' and category_sort_by in pivot_df.columns:
-                    pivot_df = pivot_df.sort_values(by=category_sort_by, ascending=category_sort_ascending)
-                
-                fig = go.Figure(data=go.Heatmap(
-                    z=pivot_df.values,
-                    x=pivot_df.columns,
-                    y=pivot_df.index,
-                    colorscale='RdYlGn',
-                    text=pivot_df.values.round(1),
-                    texttemplate='%{text}%',
-                    textfont={"size": 12},
-                    hovertemplate='Category: %{y}<br>Response: %{x}<br>Percentage: %{z:.1f}%<extra></extra>'
-                ))
+            if not group_df_plot.empty:
+                fig = grouped_bar_figure(group_df_plot, group_col, group_order, color_map)
                 
                 fig.update_layout(
-                    xaxis_title="Response Type",
-                    yaxis_title="Question Category",
-                    height=max(400, len(selected_categories) * 60)
+                    xaxis_title=group_col,
+                    yaxis_title="Percentage (%)",
+                    height=450
                 )
                 
                 st.plotly_chart(fig, width='stretch')
         
-        # Detailed heatmap by individual question
-        st.markdown("---")
-        st.subheader("Response Heatmap by Individual Question")
-        
-        # Sorting options
-        col_sort1, col_sort2, col_sort3 = st.columns([2, 1, 1])
-        
-        with col_sort2:
-            sort_by = st.selectbox(
-                "Sort by:",
-                options=sort_options,
-                index=0,
-                key="heatmap_sort",
-                help="Sort questions by percentage of selected response"
-            )
-        
-        with col_sort3:
-            if sort_by != 'None':
-                sort_ascending = st.checkbox(
-                    "Ascending",
-                    value=True,
-                    key="heatmap_sort_order",
-                    help="Check for ascending (low to high), uncheck for descending (high to low)"
-                )
-            else:
-                sort_ascending = True
-        
-        with col_sort1:
-            if sort_by != 'None':
-                sort_direction = "ascending (low to high)" if sort_ascending else "descending (high to low)"
-                st.markdown(f"Questions sorted by **{sort_by}** ({sort_direction}). Scroll to view all questions.")
-            else:
-                st.markdown("Each row represents a single question, showing the distribution of responses. Scroll to view all questions.")
-        
-        # Build heatmap data for all questions
-        question_heatmap_data = []
-        
-        # Wrap text helper function
-        def wrap_text(text, max_len=60):
-            """Wrap text at word boundaries"""
-            words = text.split()
-            lines = []
-            current_line = []
-            current_length = 0
-            
-            for word in words:
-                if current_length + len(word) + 1 <= max_len:
-                    current_line.append(word)
-                    current_length += len(word) + 1
-                else:
-                    if current_line:
-                        lines.append(' '.join(current_line))
-                    current_line = [word]
-                    current_length = len(word)
-            
-            if current_line:
-                lines.append(' '.join(current_line))
-            
-            return '<br>'.join(lines)
-        
-        for question in selected_questions:
-            question_responses = filtered_df[question].dropna()
-            grouped_question = group_responses(question_responses, group_responses_mode, exclude_dont_know)
-            
-            if not grouped_question.empty:
-                dist = grouped_question.value_counts()
-                total = len(grouped_question)
-                
-                wrapped_question = wrap_text(question)
-                
-                row_data = {
-                    'Question': wrapped_question,
-                    'FullQuestion': question  # Keep full question for hover
-                }
-                
-                # Add percentage for each response type
-                if group_responses_mode:
-                    if exclude_dont_know:
-                        col_order = ['Positive', 'Negative']
-                    else:
-                        col_order = ['Positive', "Don't Know", 'Negative']
-                else:
-                    if exclude_dont_know:
-                        col_order = ['Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree']
-                    else:
-                        col_order = ['Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree']
-                
-                for resp_type in col_order:
-                    row_data[resp_type] = (dist.get(resp_type, 0) / total * 100) if total > 0 else 0
-                
-                question_heatmap_data.append(row_data)
-        
-        if question_heatmap_data:
-            q_heatmap_df = pd.DataFrame(question_heatmap_data)
-            
-            # Extract full questions before setting index
-            full_questions = q_heatmap_df['FullQuestion'].tolist()
-            
-            # Set index and remove FullQuestion column from display
-            q_heatmap_df = q_heatmap_df.set_index('Question')
-            q_heatmap_df = q_heatmap_df.drop(columns=['FullQuestion'])
-            
-            # Reorder columns
-            if group_responses_mode:
-                if exclude_dont_know:
-                    col_order = ['Positive', 'Negative']
-                else:
-                    col_order = ['Positive', "Don't Know", 'Negative']
-            else:
-                if exclude_dont_know:
-                    col_order = ['Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree']
-                else:
-                    col_order = ['Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree']
-            
-            q_heatmap_df = q_heatmap_df[[col for col in col_order if col in q_heatmap_df.columns]]
-            
-            # Sort if a sort option is selected
-            if sort_by != 'None' and sort_by in q_heatmap_df.columns:
-                # Create a temporary dataframe with full questions for reordering
-                temp_df = q_heatmap_df.copy()
-                temp_df['FullQuestion'] = full_questions
-                temp_df = temp_df.sort_values(by=sort_by, ascending=sort_ascending)
-                
-                # Extract sorted full questions and drop the column
-                full_questions = temp_df['FullQuestion'].tolist()
-                q_heatmap_df = temp_df.drop(columns=['FullQuestion'])
-            
-            # Create custom hover text with full questions
-            hover_text = []
-            for idx, full_q in enumerate(full_questions):
-                row_hover = []
-                for col in q_heatmap_df.columns:
-                    hover_val = q_heatmap_df.iloc[idx][col]
-                    hover_str = f"<b>Question:</b><br>{full_q}<br><br><b>Response:</b> {col}<br><b>Percentage:</b> {hover_val:.1f}%"
-                    row_hover.append(hover_str)
-                hover_text.append(row_hover)
-            
-            fig = go.Figure(data=go.Heatmap(
-                z=q_heatmap_df.values,
-                x=q_heatmap_df.columns,
-                y=q_heatmap_df.index,
-                colorscale='RdYlGn',
-                text=q_heatmap_df.values.round(1),
-                texttemplate='%{text}%',
-                textfont={"size": 11},
-                hovertemplate='%{customdata}<extra></extra>',
-                customdata=hover_text
-            ))
-            
-            # Calculate height: give each question more space (50px per question minimum)
-            chart_height = max(1000, len(selected_questions) * 50)
-            
-            fig.update_layout(
-                height=chart_height,
-                yaxis={
-                    'tickfont': {'size': 11},
-                    'tickmode': 'linear',
-                    'side': 'left',
-                    'title': 'Question'
-                },
-                margin=dict(l=400, r=50, t=100, b=100)  # More top/bottom margin for labels
-            )
-            
-            # Configure x-axis to show on both top and bottom
-            fig.update_xaxes(
-                side='top',
-                tickfont={'size': 11},
-                title_text='Response Type',
-                title_standoff=15,
-                mirror='ticks',
-                showticklabels=True,
-                ticks='outside'
-            )
-            
-            # Use container with specific height to enable scrolling
-            st.markdown(
-                """
-                <style>
-                .scrollable-chart {
-                    height: 800px;
-                    overflow-y: scroll;
-                    overflow-x: hidden;
-                }
-                </style>
-                """,
-                unsafe_allow_html=True
-            )
-            
-            st.plotly_chart(fig, width='stretch')
-        else:
-            st.info("No question data available for heatmap.")
+        render_quick_question_analysis(counts, selected_questions, group_responses_mode)
+        render_category_heatmap(counts, selected_categories, question_categories, response_order)
+        render_question_heatmap(counts, selected_questions, question_categories, response_order)
     
     with tab2:
-        # Detailed question-by-question analysis
-        st.subheader("Detailed Question Analysis")
-        st.markdown("Explore each question individually with response breakdowns by department and tenure.")
-        
-        # Search functionality for questions
-        search_query_detailed = st.text_input(
-            "Search questions:",
-            value="",
-            key="question_search_detailed",
-            placeholder="Type to filter questions..."
-        )
-        
-        # Filter questions based on search
-        if search_query_detailed:
-            filtered_questions_detailed = [q for q in selected_questions if search_query_detailed.lower() in q.lower()]
-        else:
-            filtered_questions_detailed = selected_questions
-        
-        # Show count of filtered questions
-        if search_query_detailed:
-            st.caption(f"Showing {len(filtered_questions_detailed)} of {len(selected_questions)} questions")
-        
-        # Question selector
-        if filtered_questions_detailed:
-            question_to_analyze = st.selectbox(
-                "Select a question:",
-                options=filtered_questions_detailed,
-                key="detailed_question_selector"
-            )
-        else:
-            st.warning("No questions match your search.")
-            question_to_analyze = None
-        
-        if question_to_analyze:
-            st.markdown(f"**Question:** {question_to_analyze}")
-            st.markdown("---")
-            
-            # Get responses for this question
-            question_data = filtered_df[question_to_analyze].dropna()
-            grouped_data = group_responses(question_data, group_responses_mode, exclude_dont_know)
-            
-            if not grouped_data.empty:
-                # Overall stats for this question
-                col1, col2, col3 = st.columns(3)
-                
-                total_resp = len(grouped_data)
-                dist = grouped_data.value_counts()
-                
-                with col1:
-                    st.metric("Total Responses", total_resp)
-                
-                if group_responses_mode:
-                    positive_count = dist.get('Positive', 0)
-                    negative_count = dist.get('Negative', 0)
-                    with col2:
-                        st.metric("Positive", f"{(positive_count/total_resp*100):.1f}%", f"{positive_count} responses")
-                    with col3:
-                        st.metric("Negative", f"{(negative_count/total_resp*100):.1f}%", f"{negative_count} responses")
-                else:
-                    agree_count = dist.get('Strongly Agree', 0) + dist.get('Agree', 0)
-                    disagree_count = dist.get('Strongly Disagree', 0) + dist.get('Disagree', 0)
-                    with col2:
-                        st.metric("Agree/Strongly Agree", f"{(agree_count/total_resp*100):.1f}%", f"{agree_count} responses")
-                    with col3:
-                        st.metric("Disagree/Strongly Disagree", f"{(disagree_count/total_resp*100):.1f}%", f"{disagree_count} responses")
-                
-                st.markdown("---")
-                
-                # Overall distribution
-                col1, col2 = st.columns([1, 1])
-                
-                with col1:
-                    st.markdown("#### Overall Distribution")
-                    dist_pct = (dist / total_resp * 100).round(1)
-                    
-                    # Order responses
-                    if group_responses_mode:
-                        if exclude_dont_know:
-                            order = ['Positive', 'Negative']
-                        else:
-                            order = ['Positive', "Don't Know", 'Negative']
-                    else:
-                        if exclude_dont_know:
-                            order = ['Strongly Agree', 'Agree', 'Disagree', 'Strongly Disagree']
-                        else:
-                            order = ['Strongly Agree', 'Agree', "Don't Know", 'Disagree', 'Strongly Disagree']
-                    
-                    ordered_dist = dist.reindex([o for o in order if o in dist.index])
-                    ordered_dist_pct = dist_pct.reindex([o for o in order if o in dist_pct.index])
-                    
-                    fig = go.Figure(data=[go.Bar(
-                        y=ordered_dist.index,
-                        x=ordered_dist.values,
-                        orientation='h',
-                        text=[f"{v:.1f}%" for v in ordered_dist_pct.values],
-                        textposition='auto',
-                        marker_color=[color_map.get(x, '#3498db') for x in ordered_dist.index]
-                    )])
-                    
-                    fig.update_layout(
-                        xaxis_title="Number of Responses",
-                        yaxis_title="Response",
-                        height=300,
-                        showlegend=False
-                    )
-                    
-                    st.plotly_chart(fig, width='stretch')
-                
-                with col2:
-                    st.markdown("#### Response Breakdown")
-                    for resp_type in ordered_dist.index:
-                        count = ordered_dist[resp_type]
-                        pct = ordered_dist_pct[resp_type]
-                        st.markdown(f"**{resp_type}:** {count} ({pct:.1f}%)")
-                
-                st.markdown("---")
-                
-                # By Department
-                st.markdown("#### Breakdown by Department")
-                
-                dept_question_data = []
-                for dept in selected_departments:
-                    dept_responses = filtered_df[filtered_df['Department'] == dept][question_to_analyze].dropna()
-                    grouped_dept = group_responses(dept_responses, group_responses_mode, exclude_dont_know)
-                    
-                    if not grouped_dept.empty:
-                        dept_dist = grouped_dept.value_counts()
-                        dept_total = len(grouped_dept)
-                        
-                        for resp_type, count in dept_dist.items():
-                            dept_question_data.append({
-                                'Department': dept,
-                                'Response': resp_type,
-                                'Count': count,
-                                'Percentage': (count / dept_total * 100) if dept_total > 0 else 0
-                            })
-                
-                if dept_question_data:
-                    dept_q_df = pd.DataFrame(dept_question_data)
-                    
-                    fig = px.bar(
-                        dept_q_df,
-                        x='Department',
-                        y='Percentage',
-                        color='Response',
-                        barmode='group',
-                        category_orders={'Response': [c for c in order if c in dept_q_df['Response'].unique()]},
-                        color_discrete_map=color_map,
-                        hover_data=['Count'],
-                        text='Percentage'
-                    )
-                    
-                    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-                    
-                    fig.update_layout(
-                        xaxis_title="Department",
-                        yaxis_title="Percentage (%)",
-                        height=400
-                    )
-                    
-                    st.plotly_chart(fig, width='stretch')
-                else:
-                    st.info("No department data available for this question.")
-                
-                st.markdown("---")
-                
-                # By Tenure
-                st.markdown("#### Breakdown by Tenure")
-                
-                tenure_question_data = []
-                for tenure in selected_tenure:
-                    tenure_responses = filtered_df[filtered_df['Tenure'] == tenure][question_to_analyze].dropna()
-                    grouped_tenure = group_responses(tenure_responses, group_responses_mode, exclude_dont_know)
-                    
-                    if not grouped_tenure.empty:
-                        tenure_dist = grouped_tenure.value_counts()
-                        tenure_total = len(grouped_tenure)
-                        
-                        for resp_type, count in tenure_dist.items():
-                            tenure_question_data.append({
-                                'Tenure': tenure,
-                                'Response': resp_type,
-                                'Count': count,
-                                'Percentage': (count / tenure_total * 100) if tenure_total > 0 else 0
-                            })
-                
-                if tenure_question_data:
-                    tenure_q_df = pd.DataFrame(tenure_question_data)
-                    
-                    fig = px.bar(
-                        tenure_q_df,
-                        x='Tenure',
-                        y='Percentage',
-                        color='Response',
-                        barmode='group',
-                        category_orders={'Response': [c for c in order if c in tenure_q_df['Response'].unique()]},
-                        color_discrete_map=color_map,
-                        hover_data=['Count'],
-                        text='Percentage'
-                    )
-                    
-                    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-                    
-                    fig.update_layout(
-                        xaxis_title="Tenure",
-                        yaxis_title="Percentage (%)",
-                        height=400
-                    )
-                    
-                    st.plotly_chart(fig, width='stretch')
-                else:
-                    st.info("No tenure data available for this question.")
-            else:
-                st.warning("No responses available for this question with the current filters.")
+        render_detailed_analysis(counts, selected_questions, selected_departments, selected_tenure, group_responses_mode, response_order, color_map)
 
 if __name__ == "__main__":
     main()